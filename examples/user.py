@@ -4,7 +4,7 @@
 # Author: Scott Reynolds <scott@scottreynolds.us>
 #
 """Example of a User Model"""
-from redboy.record import Record, MirroredRecord
+from redboy.record import Record, ReferenceMirror
 from redboy.key import Key
 from redboy.view import Queue, Stack, Score
 from time import time
@@ -15,8 +15,9 @@ user_prefix = "user:"
 view_prefix = "created:"
 pool_name = "database"
 
-class UserEmail(MirroredRecord):
-    """Mirrored Record allows for fetching by user email"""
+class UserEmail(ReferenceMirror):
+    """Reference Mirror allows for fetching by user email without storing a
+    second copy of the user"""
     def mirror_key(self, parent_record):
         assert isinstance(parent_record, Record)
         if 'email' in parent_record:
@@ -43,6 +44,8 @@ class User(Record):
         )
     _mirrors = (UserEmail(),)
 
+UserEmail._parent_class = User
+
 def main():
     scott = User(first_name="Scott", last_name="Reynolds", created=time())
     try:
@@ -65,6 +68,7 @@ def main():
     thomas_jeffereson = User(first_name="thomas", last_name="jefferson",
                              email="no-replay@us.gov", created=time()).save()
     assert thomas_jeffereson['first_name'] == UserEmail().load(thomas_jeffereson['email'])['first_name']
+    assert thomas_jeffereson.key.key == UserEmail().load(thomas_jeffereson['email']).parent.key.key
 
     assert len(user_view) == 2, "Only two users in the view"
     assert len(stack_view) == 2, "Only two users in the stack view"
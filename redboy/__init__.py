@@ -6,15 +6,41 @@
 
 """Redboy, an object non-relational manager for Redis"""
 import redis
+import threading
+import redboy.exceptions as exc
+
+try:
+    from rediscluster import RedisCluster
+except ImportError:
+    RedisCluster = None
 
 _CONNECTIONS = {}
 
+# Guards changes to _CONNECTIONS.
+_LOCK = threading.RLock()
+
 def add_pool(name, **kwargs):
     """Add a redis connection pool under the provided name."""
-    _CONNECTIONS[name] = redis.StrictRedis(**kwargs)
+    with _LOCK:
+        _CONNECTIONS[name] = redis.StrictRedis(**kwargs)
+
+def add_cluster_pool(name, **kwargs):
+    """Add a Redis Cluster connection under the provided name. Requires
+    redis-py-cluster."""
+    if RedisCluster is None:
+        raise exc.RedboyException("redis-py-cluster is required for cluster "
+                                  "pools")
+    with _LOCK:
+        _CONNECTIONS[name] = RedisCluster(**kwargs)
 
 def get_pool(name):
     """Return the requested pool or create one on localhost db=0."""
-    if name not in _CONNECTIONS:
-        add_pool(name)
-    return _CONNECTIONS[name]
+    try:
+        return _CONNECTIONS[name]
+    except KeyError:
+        pass
+
+    with _LOCK:
+        if name not in _CONNECTIONS:
+            add_pool(name)
+        return _CONNECTIONS[name]
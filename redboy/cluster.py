@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+#
+# © 2012 Scott Reynolds
+# Author: Scott Reynolds <scott@scottreynolds.us>
+#
+"""Redboy: Redis Cluster helpers"""
+
+from redboy import RedisCluster
+
+def is_cluster(connection):
+    """Return whether connection talks to a Redis Cluster."""
+    return RedisCluster is not None and isinstance(connection, RedisCluster)
+
+def pipeline(connection):
+    """Return a transactional pipeline on connection. Cluster pipelines can't
+    be transactional so the commands are only batched."""
+    return connection.pipeline(transaction=not is_cluster(connection))
+
+def execute(connection, command, keys):
+    """Run command on each of keys in one pipeline and return the replies in
+    the order of keys. A cluster pipeline splits the commands by the node
+    owning their slot and sends every node its batch before reading any
+    reply, so the nodes work in parallel."""
+    if not keys:
+        return []
+
+    batch = connection.pipeline(transaction=False)
+    for key in keys:
+        getattr(batch, command)(key)
+    return batch.execute()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# © 2012 Scott Reynolds
+# Author: Scott Reynolds <scott@scottreynolds.us>
+#
+"""Redboy: Helpers for using Redboy from many threads"""
+
+from multiprocessing.pool import ThreadPool
+import sys
+import threading
+
+# Most threads used by parallel().
+MAX_PARALLEL = 8
+
+class _Call(object):
+    """A call in flight, waited on by every thread asking for the same key."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result, self.error = None, None
+
+class SingleFlight(object):
+    """Collapses concurrent calls for the same key into one call whose result
+    is shared by every caller."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        """Call function unless another thread is already doing so for key, in
+        which case wait for and return its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error:
+                raise call.error[0], call.error[1], call.error[2]
+            return call.result
+
+        try:
+            call.result = function()
+        except:
+            call.error = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+# Shared by every Record with _single_flight enabled.
+FLIGHTS = SingleFlight()
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+# Marks the threads of _POOL, so nested calls to parallel() run in place
+# instead of waiting on the pool they are running in.
+_WORKER = threading.local()
+
+def _pool():
+    """Return the thread pool shared by parallel(), creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPool(MAX_PARALLEL)
+        return _POOL
+
+def _in_worker(function):
+    """Wrap function to run marked as a thread of the pool."""
+    def run(group):
+        _WORKER.active = True
+        try:
+            return function(group)
+        finally:
+            _WORKER.active = False
+    return run
+
+def parallel(function, groups):
+    """Map function over groups, using the shared thread pool when there is more
+    than one group."""
+    groups = list(groups)
+    if len(groups) < 2 or getattr(_WORKER, 'active', False):
+        return map(function, groups)
+    return _pool().map(_in_worker(function), groups)
@@ -17,3 +17,7 @@ class ErrorMissingField(RedboyException):
 class ErrorMissingKey(RedboyException):
     """No key to save the data too"""
     pass
+
+class ErrorInvalidValue(RedboyException):
+    """A value that can't be stored in a field"""
+    pass
@@ -14,22 +14,38 @@ class Key(object):
     A key determines how to extract the data from Redis. Maintains binary
     safe representation
     """
-    def __init__(self, pool_name, prefix="", key=None):
+    def __init__(self, pool_name, prefix="", key=None, hash_tag=None):
         """Create a key that connects to the pool identified by pool_name with
         the prefix and a string key. The key can be None and the a uuid will be
-        used in its place."""
+        used in its place. Keys sharing a hash_tag are stored in the same Redis
+        Cluster slot. A hash_tag of True tags the key with itself, so only keys
+        with the same key share a slot."""
         key = key or uuid.uuid4().hex
         self.pool_name = pool_name
         self.prefix = prefix
         self.key = key
+        self.hash_tag = hash_tag
 
     def _attrs(self):
         """Get attributes of this key."""
         return dict((attr, getattr(self, attr)) for attr in
-                    ('pool_name', 'prefix', 'key',))
+                    ('pool_name', 'prefix', 'key', 'hash_tag',))
+
+    def tagged_prefix(self):
+        """Return what precedes the key: the prefix and the hash tag, if there
+        is one."""
+        if self.hash_tag is True:
+            return self.prefix + "{"
+        if self.hash_tag:
+            return "%s{%s}" % (self.prefix, self.hash_tag)
+        return self.prefix
+
+    def tagged_suffix(self):
+        """Return what follows the key, closing a hash tag of the key itself."""
+        return "}" if self.hash_tag is True else ""
 
     def __str__(self):
-        return self.prefix + self.key
+        return self.tagged_prefix() + self.key + self.tagged_suffix()
 
     def __repr__(self):
         """Return a printable representation of this key."""
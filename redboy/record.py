@@ -8,9 +8,13 @@
 from itertools import ifilterfalse as filternot
 from redboy.key import Key
 from redboy import get_pool
+from redboy.concurrency import FLIGHTS, parallel
 
+import redboy.cluster as cluster
 import redboy.exceptions as exc
+import redboy.scripts as scripts
 import copy
+import json
 
 class Record(dict):
     """A record is a collection of key:value pairs that map to a dictionary"""
@@ -33,6 +37,25 @@ class Record(dict):
     # Tuple of alternative copies of this Record.
     _mirrors = ()
 
+    # Redis Cluster hash tag of the Record's keys. A string is shared by every
+    # Record of the class and its unique indices, keeping them in one slot so
+    # scripts and transactions can span them, but also on one primary. True
+    # tags each Record with its own key, spreading Records over the cluster;
+    # the unique index hashes then live in slots of their own and indexed loads
+    # take two round trips.
+    _hash_tag = None
+
+    # Share a single fetch between threads loading the same key at once.
+    _single_flight = False
+
+    # Key of a Redis Stream that change events are added to by save() and
+    # remove(). Events are written in the pipeline of the Record's own writes, so
+    # the stream always lives in the Record's pool.
+    _stream = None
+
+    # Approximate length the change stream is trimmed to, None to keep it all.
+    _stream_maxlen = None
+
     def __init__(self, *args, **kwargs):
         dict.__init__(self)
         self._clean()
@@ -55,20 +78,96 @@ class Record(dict):
         self._clean()
 
         pool_name = key.pool_name or self._pool_name
-        self._original = get_pool(pool_name).hgetall(str(key))
+        self._original = dict(self._fetch(
+            ('hgetall', pool_name, str(key)),
+            lambda: get_pool(pool_name).hgetall(str(key))))
 
         self.revert()
         self.key = key
 
         return self
 
+    def load_many(self, keys):
+        """Load a Record for each of keys with a pipeline for each pool, the
+        pools being loaded in parallel. Returns a list in the order of keys with
+        None for every Record that doesn't exist."""
+        keys = [key if isinstance(key, Key) else self.make_key(key)
+                for key in keys]
+
+        pools = {}
+        for position, key in enumerate(keys):
+            pools.setdefault(key.pool_name or self._pool_name,
+                             []).append(position)
+
+        def fetch(group):
+            pool_name, positions = group
+            return zip(positions, cluster.execute(
+                get_pool(pool_name), 'hgetall',
+                [str(keys[position]) for position in positions]))
+
+        records = [None] * len(keys)
+        for replies in parallel(fetch, pools.items()):
+            for position, original in replies:
+                if original:
+                    records[position] = self._make_record(keys[position],
+                                                          original)
+        return records
+
     def load_by_index(self, field, value):
         """Load the Record by the unqiue index. field must be contained in
         self._indices and is the value of the field. Constructs a key throught
         self.make_key()"""
         self._clean()
-        key = self.make_index_key(field)
-        return self.load(get_pool(key.pool_name).hget(str(key), value))
+        index_key = self.make_index_key(field)
+        record_key = self.make_key()
+
+        def fetch():
+            connection = get_pool(index_key.pool_name)
+            if self._can_script(connection):
+                response = scripts.run(
+                    connection, scripts.LOAD_BY_INDEX, keys=(str(index_key),),
+                    args=(value, record_key.tagged_prefix(),
+                          record_key.tagged_suffix()))
+                return response and (response[0], scripts.pairs(response[1]))
+
+            key = connection.hget(str(index_key), value)
+            return key and (key, connection.hgetall(str(self.make_key(key))))
+
+        response = self._fetch(
+            ('index', index_key.pool_name, str(index_key), value), fetch)
+        if response:
+            self._original = dict(response[1])
+            self.revert()
+            self.key = self.make_key(response[0])
+
+        return self
+
+    def load_many_by_index(self, field, values):
+        """Load a Record for each of the values of the unique index on field.
+        Returns a list in the order of values with None for every value that
+        isn't indexed."""
+        if not values:
+            return []
+
+        index_key = self.make_index_key(field)
+        connection = get_pool(index_key.pool_name)
+        keys = connection.hmget(str(index_key), values)
+
+        hits = [self.make_key(key) for key in keys if key]
+        responses = iter(zip(hits, cluster.execute(
+            connection, 'hgetall', [str(key) for key in hits])))
+
+        records = []
+        for key in keys:
+            if not key:
+                records.append(None)
+                continue
+
+            key, original = next(responses)
+            records.append(self._make_record(key, original)
+                           if original else None)
+
+        return records
 
     def save(self):
         """Save the record, returns self."""
@@ -82,19 +181,28 @@ class Record(dict):
 
         assert isinstance(self.key, Key), "Bad record key in save()"
 
-        # Marshal and save changes
+        # Marshal and save changes along with their change event
         changes = self._marshal()
-        self._save_internal(self.key, changes)
+        pipeline = cluster.pipeline(get_pool(self._key_pool_name()))
+        self._save_internal(self.key, changes, pipeline)
+        self._publish(pipeline, 'save',
+                      [field for field, _, _ in changes['changed']],
+                      [field for field, _ in changes['deleted']])
+        pipeline.execute()
 
         try:
             try:
                 # Save mirrors
                 for mirror in self.get_mirrors():
-                    mirror._save_internal(mirror.mirror_key(self), changes)
+                    if isinstance(mirror, ReferenceMirror):
+                        mirror._save_reference(
+                            self, None if new_record else
+                            self._original_record())
+                    else:
+                        mirror._save_internal(mirror.mirror_key(self), changes)
             finally:
                 # Update Views
-                for view in self.get_views():
-                    view.record_class = self.__class__
+                for view in self._bound_views():
                     view.append(self, new_record)
         finally:
             # Clean up internal state
@@ -104,35 +212,121 @@ class Record(dict):
 
         return self
 
-    def remove(self):
-        """Remove this record from Redis."""
-        pool_name = self.key.pool_name
+    def remove(self, key=None):
+        """Remove this record from Redis. When key is given the copy saved
+        under it is deleted instead, leaving this object alone, so a mirror
+        instance shared by every record of a class can remove their copies."""
+        if key is not None:
+            get_pool(key.pool_name or self._pool_name).delete(str(key))
+            return self
+
+        pool_name = self._key_pool_name()
         try:
             try:
                 # Save mirrors
                 for mirror in self.get_mirrors():
-                    mirror.key = mirror.mirror_key(self)
-                    mirror.remove()
+                    mirror_key = mirror.mirror_key(self)
+                    if mirror_key:
+                        mirror.remove(mirror_key)
             finally:
                 # Update viewes
-                for view in self.get_views():
-                    view.record_class = self.__class__
+                for view in self._bound_views():
                     view.remove(self)
         finally:
-            pool = get_pool(pool_name)
-            pool.delete(str(self.key))
-            for index in self._indices:
-                unqiue_field_key = self.make_index_key(index, self.key)
-                pool.hdel(unqiue_field_key, self[index])
-            self._clean()
+            try:
+                pipeline = cluster.pipeline(get_pool(pool_name))
+                pipeline.delete(str(self.key))
+                for index in self._indices:
+                    if index in self:
+                        unqiue_field_key = self.make_index_key(index, self.key)
+                        pipeline.hdel(str(unqiue_field_key), self[index])
+                self._publish(pipeline, 'remove', [], self.keys())
+                pipeline.execute()
+            finally:
+                self._clean()
+        return self
+
+    def incr(self, field, amount=1, views=True):
+        """Atomically add amount to the integer field without a load() or a
+        save(). Mirrors and change events are written in the same pipeline and
+        Score views are updated when views is True; Score views that recompute
+        their score skip Records missing the fields it reads. Writes to other
+        pools are sent once the Record's pipeline succeeded. Returns the new
+        value."""
+        return self._increment('hincrby', field, amount, views)
+
+    def incr_float(self, field, amount=1.0, views=True):
+        """Atomically add amount to the float field, see Record.incr()."""
+        return self._increment('hincrbyfloat', field, amount, views)
+
+    def set_fields(self, fields, views=True):
+        """Write the fields dictionary straight into the saved record, leaving
+        its other fields and pending changes alone. Indices, mirrors and change
+        events are written in the same pipeline and views are updated when
+        views is True. A full mirror whose key changes is moved to the new key
+        and rebuilt from the saved fields of the Record. Writes to other pools
+        are sent once the Record's pipeline succeeded. Returns self."""
+        if not self.key:
+            raise exc.ErrorMissingKey("Only saved records can be updated.")
+        if None in fields.values():
+            raise exc.ErrorInvalidValue("You may not set an item to None.")
+
+        changes = {'deleted': (),
+                   'changed': tuple((field, value, self._original.get(field))
+                                    for field, value in fields.iteritems())}
+        original, updated = self._original_record(), self._original_record()
+        for field, value in fields.iteritems():
+            dict.__setitem__(updated, field, value)
+
+        pipelines = {}
+        pipeline = self._pipeline(pipelines, self._key_pool_name())
+        self._save_internal(self.key, changes, pipeline)
+
+        references = []
+        for mirror in self.get_mirrors():
+            if isinstance(mirror, ReferenceMirror):
+                references.append(mirror)
+                continue
+
+            mirror_key = mirror.mirror_key(updated)
+            old_key = mirror.mirror_key(original)
+            mirror_changes = changes
+            if old_key and (not mirror_key or str(old_key) != str(mirror_key)):
+                self._pipeline(pipelines, old_key.pool_name or
+                               mirror._pool_name).delete(str(old_key))
+                mirror_changes = {'deleted': (),
+                                  'changed': tuple(
+                                      (field, value, None)
+                                      for field, value in updated.iteritems())}
+            if mirror_key:
+                mirror._save_internal(
+                    mirror_key, mirror_changes,
+                    self._pipeline(pipelines, mirror_key.pool_name or
+                                   mirror._pool_name))
+
+        self._publish(pipeline, 'save', fields.keys(), [])
+        self._execute(pipelines)
+
+        for field, value in fields.iteritems():
+            self._set_saved(field, value)
+
+        # Reference mirror keys can depend on the new values.
+        for mirror in references:
+            mirror._save_reference(self, original)
+
+        if views:
+            for view in self._bound_views():
+                view.append(self, False)
+
         return self
 
     def make_key(self, key=None):
         """Makes a key from the provided string key"""
         if not self.key:
-            return Key(self._pool_name, self._prefix, key)
+            return Key(self._pool_name, self._prefix, key, self._hash_tag)
         else:
-            return Key(self.key._pool_name, self.key._prefix, key)
+            return Key(self.key.pool_name, self.key.prefix, key,
+                       self.key.hash_tag)
 
     def make_index_key(self, field, key=None):
         """Makes a new Key object for the unique index on field"""
@@ -171,13 +365,145 @@ class Record(dict):
         return [mirror if isinstance(mirror, type) else mirror
                 for mirror in self._mirrors]
 
-    def _save_internal(self, key, changes):
-        """Internal save method."""
+    def _bound_views(self):
+        """Return the views of the Record, first pointing the ones still
+        reading the base Record class to this class. Views are shared, so they
+        are only written to once."""
+        views = self.get_views()
+        for view in views:
+            if view.record_class is Record:
+                view.record_class = self.__class__
+        return views
+
+    def _fetch(self, flight_key, function):
+        """Call function, sharing the call with other threads fetching
+        flight_key when single flight is enabled."""
+        if self._single_flight:
+            return FLIGHTS.do(flight_key, function)
+        return function()
+
+    def _increment(self, command, field, amount, views):
+        """Run the increment command on field of the record and its mirrors."""
+        if not self.key:
+            raise exc.ErrorMissingKey("Only saved records can be incremented.")
+        assert field not in self._indices, "Can't increment a unique index"
+
+        pipelines = {}
+        pipeline = self._pipeline(pipelines, self._key_pool_name())
+        getattr(pipeline, command)(str(self.key), field, amount)
+        # Read the new value back the way a load() would see it.
+        pipeline.hget(str(self.key), field)
+
+        for mirror in self.get_mirrors():
+            if isinstance(mirror, ReferenceMirror):
+                continue
+            mirror_key = mirror.mirror_key(self)
+            if not mirror_key:
+                continue
+            getattr(self._pipeline(pipelines, mirror_key.pool_name or
+                                   mirror._pool_name),
+                    command)(str(mirror_key), field, amount)
+
+        rescore = []
+        if views:
+            for view in self._bound_views():
+                if view.update(self, {field: amount},
+                               self._pipeline(pipelines, view.key.pool_name)):
+                    rescore.append(view)
+
+        self._publish(pipeline, 'save', [field], [])
+        value, saved = self._execute(pipelines)[:2]
+        self._set_saved(field, saved)
+
+        # Recomputed scores need the new value.
+        for view in rescore:
+            view.rescore(self)
+
+        return value
+
+    def _can_script(self, connection):
+        """Return whether a script given one of the Record's keys may read the
+        others: always outside of a cluster and with a class wide hash tag on
+        one."""
+        return (not cluster.is_cluster(connection) or
+                bool(self._hash_tag and self._hash_tag is not True))
+
+    def _key_pool_name(self):
+        """Return the pool name the record is saved in."""
+        return self.key.pool_name or self._pool_name
+
+    def _pipeline(self, pipelines, pool_name):
+        """Return the pipeline of pool_name in pipelines, adding it if needed."""
+        if pool_name not in pipelines:
+            pipelines[pool_name] = cluster.pipeline(get_pool(pool_name))
+        return pipelines[pool_name]
+
+    def _execute(self, pipelines):
+        """Execute the Record's pipeline in pipelines and then, once it
+        succeeded, the pipelines of the other pools. Returns the replies of the
+        Record's pipeline."""
+        pipelines = dict(pipelines)
+        replies = pipelines.pop(self._key_pool_name()).execute()
+        for pipeline in pipelines.values():
+            pipeline.execute()
+        return replies
+
+    def _set_saved(self, field, value):
+        """Set field to a value that is already saved in Redis."""
+        dict.__setitem__(self, field, value)
+        self._columns[field] = value
+        self._original[field] = value
+        self._modified.pop(field, None)
+        self._deleted.pop(field, None)
+
+    def _original_record(self):
+        """Return a copy of the Record holding its saved values."""
+        original = self.__class__()
+        for field, value in self._original.iteritems():
+            dict.__setitem__(original, field, value)
+        original.key = self.key
+        return original
+
+    def _make_record(self, key, original):
+        """Return a new Record of this class loaded from original."""
+        record = self.__class__()
+        record._original = original
+        record.revert()
+        record.key = key
+        return record
+
+    def _publish(self, pipeline, operation, changed, deleted):
+        """Add a change event for operation to the Record's stream through
+        pipeline. changed and deleted are the affected field names. Saves that
+        change nothing add no event."""
+        if not self._stream:
+            return
+        if operation == 'save' and not (changed or deleted):
+            return
+        assert self._stream.pool_name in ("", self._key_pool_name()), \
+            "The change stream must live in the Record's pool"
+
+        pipeline.xadd(str(self._stream),
+                      {'class': "%s.%s" % (self.__class__.__module__,
+                                           self.__class__.__name__),
+                       'operation': operation,
+                       'key': self.key.key,
+                       'changed': json.dumps(list(changed)),
+                       'deleted': json.dumps(list(deleted))},
+                      maxlen=self._stream_maxlen)
+
+    def _save_internal(self, key, changes, pipeline=None):
+        """Internal save method. The changes are sent in pipeline, or in a
+        pipeline of their own when it isn't provided."""
         if not key:
             return
 
-        pool_name = key.pool_name or self._pool_name
-        connection_pool = get_pool(pool_name)
+        if pipeline is None:
+            pool_name = key.pool_name or self._pool_name
+            pipeline = cluster.pipeline(get_pool(pool_name))
+            self._save_internal(key, changes, pipeline)
+            pipeline.execute()
+            return
 
         # Delete items
         if changes['deleted']:
@@ -187,21 +513,18 @@ class Record(dict):
                 # Delete the record from the unique indices.
                 if field in self._indices:
                     unique_field_key = self.make_index_key(field, key)
-                    connection_pool.hdel(
+                    pipeline.hdel(
                         str(unique_field_key),
                         old_value)
 
             # Remove the deleted field from hash
             deleted_fields = [x[0] for x in changes['deleted']]
-            connection_pool.hdel(str(key), *deleted_fields)
-
-        self._deleted.clear()
+            pipeline.hdel(str(key), *deleted_fields)
 
         # Update items
         if changes['changed']:
-            # @TODO: Use Pipeline to protect this.
             for field, value, original_value in changes['changed']:
-                connection_pool.hset(str(key), field, value)
+                pipeline.hset(str(key), field, value)
 
                 # Update the unique indexes
                 if field in self._indices:
@@ -209,12 +532,12 @@ class Record(dict):
 
                     # Delete the old index.
                     if original_value:
-                        connection_pool.hdel(
+                        pipeline.hdel(
                             str(unique_field_key),
                             original_value)
 
                     # Add the new index.
-                    connection_pool.hset(
+                    pipeline.hset(
                         str(unique_field_key),
                         value,
                         key.key)
@@ -275,3 +598,80 @@ class MirroredRecord(Record):
     def save(self):
         """Refuse to save this record."""
         raise exc.ErrorImmutable("Mirrored records are immutable.")
+
+class ReferenceMirror(MirroredRecord):
+
+    """A mirrored record that only stores the key of its parent.
+
+    Loading resolves the reference to the parent record in a single round
+    trip, so the parent and the mirror must live in the same pool. On a cluster
+    that takes a class wide hash tag shared with the parent, otherwise it takes
+    two round trips."""
+
+    # Record class the references point to. When set, load() also builds the
+    # parent Record in self.parent.
+    _parent_class = None
+
+    def load(self, key):
+        """Load the parent Record referenced by key. The fields of the parent
+        are loaded into the mirror, the full key of the parent into
+        self.parent_key and, with a _parent_class, the parent Record itself into
+        self.parent."""
+        if not isinstance(key, Key):
+            key = self.make_key(key)
+
+        self._clean()
+
+        connection = get_pool(key.pool_name or self._pool_name)
+        if self._can_script(connection):
+            response = scripts.run(connection, scripts.LOAD_REFERENCE,
+                                   keys=(str(key),))
+            if response:
+                response = response[0], scripts.pairs(response[1])
+        else:
+            parent_key = connection.get(str(key))
+            response = parent_key and (parent_key,
+                                       connection.hgetall(parent_key))
+
+        if response:
+            self.parent_key, self._original = response
+
+        self.revert()
+        self.key = key
+
+        if response and self._parent_class:
+            parent = self._parent_class()
+            parent_key = parent.make_key()
+            prefix = parent_key.tagged_prefix()
+            suffix = parent_key.tagged_suffix()
+            if self.parent_key.startswith(prefix) and \
+                    self.parent_key.endswith(suffix):
+                self.parent = parent._make_record(
+                    parent.make_key(self.parent_key[
+                        len(prefix):len(self.parent_key) - len(suffix)]),
+                    dict(self._original))
+
+        return self
+
+    def _save_reference(self, parent, original=None):
+        """Point the reference of parent to its key, deleting the reference of
+        original, the parent as it was saved, when its mirror key changed."""
+        key = self.mirror_key(parent)
+        old_key = self.mirror_key(original) if original is not None else None
+        if not key and not old_key:
+            return
+        if key and old_key and str(key) == str(old_key):
+            return
+
+        pipeline = cluster.pipeline(
+            get_pool((key or old_key).pool_name or self._pool_name))
+        if old_key:
+            pipeline.delete(str(old_key))
+        if key:
+            pipeline.set(str(key), str(parent.key))
+        pipeline.execute()
+
+    def _clean(self):
+        """Remove every item from the object and forget the parent."""
+        Record._clean(self)
+        self.parent_key, self.parent = None, None
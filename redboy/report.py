@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+#
+# © 2012 Scott Reynolds
+# Author: Scott Reynolds <scott@scottreynolds.us>
+#
+"""Redboy: Memory and keyspace footprint report"""
+
+from redboy import get_pool
+from redboy.record import ReferenceMirror
+from redboy.view import Score
+
+def footprint(record_classes, sample=1000, batch=100, largest=5):
+    """Measure the Redis memory used by each of record_classes and the mirrors,
+    unique indices, views and change stream of each. Keys are found with SCAN,
+    up to sample keys of each structure are measured in pipelined batches of
+    batch keys and totals are estimated from the averages. Returns a list of
+    dictionaries, one for each structure, largest first."""
+    rows = []
+    for record_class in record_classes:
+        structures = _structures(record_class())
+        for structure in structures:
+            rows.append(_measure(structure, structures, sample, batch,
+                                 largest))
+    return sorted(rows, key=lambda row: row['bytes'], reverse=True)
+
+def totals(rows):
+    """Roll the footprint rows up by class. Returns a list of dictionaries of
+    the class, its estimated keys and bytes and its bytes by structure type,
+    largest first."""
+    classes = {}
+    for row in rows:
+        total = classes.setdefault(row['class'], {'class': row['class'],
+                                                  'keys': 0,
+                                                  'bytes': 0,
+                                                  'structures': {}})
+        total['keys'] += row['keys']
+        total['bytes'] += row['bytes']
+        total['structures'][row['structure']] = \
+            total['structures'].get(row['structure'], 0) + row['bytes']
+    return sorted(classes.values(), key=lambda total: total['bytes'],
+                  reverse=True)
+
+def format_report(rows):
+    """Return the footprint rows, followed by their totals by class and
+    structure type, as a printable table."""
+    lines = ["%-16s %-10s %-32s %10s %14s %10s %10s" % (
+        "class", "structure", "name", "keys", "bytes", "avg bytes",
+        "avg width")]
+    for row in rows:
+        lines.append("%-16s %-10s %-32s %10d %14d %10d %10.1f" % (
+            row['class'], row['structure'], row['name'], row['keys'],
+            row['bytes'], row['average_bytes'], row['average_width']))
+        for key, size in row['largest']:
+            lines.append("%-16s %-10s   %-30s %10s %14d" % ("", "", key, "",
+                                                            size))
+
+    kinds = ('record', 'mirror', 'index', 'view', 'stream')
+    lines.append("")
+    lines.append("%-16s %10s %14s" % ("class", "keys", "bytes") +
+                 "".join(" %12s" % kind for kind in kinds))
+    for total in totals(rows):
+        lines.append("%-16s %10d %14d" % (total['class'], total['keys'],
+                                          total['bytes']) +
+                     "".join(" %12d" % total['structures'].get(kind, 0)
+                             for kind in kinds))
+    return "\n".join(lines)
+
+def _structures(record):
+    """Return the structures a Record is stored in, each a dictionary of the
+    structure kind, its key or key pattern, its pool and the command that
+    counts its fields."""
+    name = record.__class__.__name__
+    key = record.make_key("*")
+    structures = [_structure(name, 'record', key, record, 'hlen', True)]
+
+    for mirror in record.get_mirrors():
+        structures.append(_structure(
+            name, 'mirror', mirror.make_key("*"), mirror,
+            None if isinstance(mirror, ReferenceMirror) else 'hlen', True))
+
+    for field in record._indices:
+        structures.append(_structure(name, 'index',
+                                     record.make_index_key(field), record,
+                                     'hlen', False))
+
+    for view in record.get_views():
+        structures.append(_structure(name, 'view', view.key, record,
+                                     'zcard' if isinstance(view, Score)
+                                     else 'llen', False))
+
+    if record._stream:
+        structures.append(_structure(name, 'stream', record._stream, record,
+                                     'xlen', False))
+    return structures
+
+def _structure(class_name, kind, key, record, length, pattern):
+    """Return the description of a single structure."""
+    return {'class': class_name,
+            'structure': kind,
+            'name': str(key),
+            'pool_name': key.pool_name or record._pool_name,
+            'length': length,
+            'pattern': pattern}
+
+def _measure(structure, structures, sample, batch, largest):
+    """Return the footprint row of structure."""
+    connection = get_pool(structure['pool_name'])
+
+    if structure['pattern']:
+        keys = _scan(connection, structure, structures, batch)
+    else:
+        keys = iter([structure['name']])
+
+    total, sampled = 0, []
+    for key in keys:
+        total += 1
+        if len(sampled) < sample:
+            sampled.append(key)
+
+    sizes, widths, encodings = [], [], {}
+    for start in xrange(0, len(sampled), batch):
+        pipeline = connection.pipeline(transaction=False)
+        for key in sampled[start:start + batch]:
+            pipeline.execute_command('MEMORY USAGE', key)
+            pipeline.object('encoding', key)
+            if structure['length']:
+                getattr(pipeline, structure['length'])(key)
+        replies = iter(pipeline.execute())
+
+        for key in sampled[start:start + batch]:
+            size, encoding = next(replies), next(replies)
+            width = next(replies) if structure['length'] else 0
+            # Keys that expired or were removed since being found.
+            if size is None:
+                total -= 1
+                continue
+            sizes.append((key, size))
+            widths.append(width)
+            encodings[encoding] = encodings.get(encoding, 0) + 1
+
+    measured = len(sizes) or 1
+    average = float(sum(size for _, size in sizes)) / measured
+    row = dict(structure)
+    row.update({'keys': total,
+                'sampled': len(sizes),
+                'bytes': int(average * total),
+                'average_bytes': int(average),
+                'average_width': float(sum(widths)) / measured,
+                'encodings': encodings,
+                'largest': sorted(sizes, key=lambda size: size[1],
+                                  reverse=True)[:largest]})
+    return row
+
+def _scan(connection, structure, structures, batch):
+    """Yield the keys matching the pattern of structure, skipping keys of the
+    other structures whose names are more specific."""
+    prefix = _prefix(structure)
+    others = [other for other in structures
+              if other is not structure and
+              other['pool_name'] == structure['pool_name'] and
+              other['name'].startswith(prefix) and
+              len(_prefix(other)) > len(prefix)]
+
+    for key in connection.scan_iter(match=structure['name'], count=batch):
+        if not any(_belongs(key, other) for other in others):
+            yield key
+
+def _belongs(key, structure):
+    """Return whether key is stored by structure."""
+    if structure['pattern']:
+        return key.startswith(_prefix(structure))
+    return key == structure['name']
+
+def _prefix(structure):
+    """Return the part of the name of structure before any wildcard."""
+    return structure['name'].split("*")[0]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+#
+# © 2012 Scott Reynolds
+# Author: Scott Reynolds <scott@scottreynolds.us>
+#
+"""Redboy: Server side Lua scripts"""
+
+# KEYS[1] is a reference mirror key holding the full key of its parent. Returns
+# the parent key and its hash or an empty reply when there is no reference. On
+# Redis Cluster the parent must share the mirror's hash tag.
+LOAD_REFERENCE = """
+local parent = redis.call('GET', KEYS[1])
+if not parent then
+    return {}
+end
+return {parent, redis.call('HGETALL', parent)}
+"""
+
+# KEYS[1] is a unique index hash and ARGV[1] the indexed value. ARGV[2] and
+# ARGV[3] are what precede and follow the record keys. Returns the record key
+# and its hash or an empty reply when the value isn't indexed. On Redis Cluster
+# the records must share the index's hash tag.
+LOAD_BY_INDEX = """
+local key = redis.call('HGET', KEYS[1], ARGV[1])
+if not key then
+    return {}
+end
+return {key, redis.call('HGETALL', ARGV[2] .. key .. ARGV[3])}
+"""
+
+def run(connection, script, keys=(), args=()):
+    """Run the script on the connection through EVALSHA."""
+    return connection.register_script(script)(keys=list(keys), args=list(args))
+
+def pairs(response):
+    """Turn a flat HGETALL reply into a dictionary."""
+    return dict(zip(response[::2], response[1::2]))
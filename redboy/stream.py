@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+# © 2012 Scott Reynolds
+# Author: Scott Reynolds <scott@scottreynolds.us>
+#
+"""Redboy: Change stream consumer"""
+
+from redboy import get_pool
+
+import json
+import redis
+
+class ChangeStream(object):
+    """Reads the change events a Record class adds to its _stream through a
+    Redis consumer group."""
+    def __init__(self, record_class, group, consumer):
+        """record_class is the Record implementation with a _stream, group the
+        name of the consumer group and consumer the name of this reader."""
+        self.record_class, self.key = record_class, record_class._stream
+        self.group, self.consumer = group, consumer
+
+    def create_group(self, start="0"):
+        """Create the consumer group, reading from the start event id. Does
+        nothing when the group already exists."""
+        try:
+            self._connection().xgroup_create(str(self.key), self.group,
+                                             id=start, mkstream=True)
+        except redis.ResponseError, error:
+            if not str(error).startswith("BUSYGROUP"):
+                raise
+
+    def read(self, count=100, block=None, pending=False):
+        """Return a batch of up to count (event_id, event, record) tuples.
+        Records are loaded in one batch and are None for removed records. block
+        is the milliseconds to wait for events. When pending is True the events
+        delivered to this consumer but never acknowledged are read again."""
+        response = self._connection().xreadgroup(
+            self.group, self.consumer, {str(self.key): "0" if pending else ">"},
+            count=count, block=block)
+
+        events = []
+        for _, messages in response or ():
+            for event_id, fields in messages:
+                event = dict(fields)
+                event['changed'] = json.loads(event['changed'])
+                event['deleted'] = json.loads(event['deleted'])
+                events.append((event_id, event))
+
+        saved = [event['key'] for _, event in events
+                 if event['operation'] != 'remove']
+        records = iter(self.record_class().load_many(saved))
+        return [(event_id, event,
+                 next(records) if event['operation'] != 'remove' else None)
+                for event_id, event in events]
+
+    def batches(self, count=100, block=1000):
+        """Yield batches of events as they arrive, forever."""
+        while True:
+            batch = self.read(count, block)
+            if batch:
+                yield batch
+
+    def ack(self, batch):
+        """Acknowledge every event of batch as processed."""
+        if batch:
+            self._connection().xack(str(self.key), self.group,
+                                    *[event_id for event_id, _, _ in batch])
+
+    def _connection(self):
+        """Return the connection the stream lives in, the Record's pool."""
+        return get_pool(self.record_class()._pool_name)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+#
+# © 2012 Scott Reynolds
+# Author: Scott Reynolds <scott@scottreynolds.us>
+#
+"""Tests for the Redis Cluster helpers"""
+import mock
+import redboy.cluster as cluster
+
+def test_execute_order():
+    """Test replies come back in the order of keys."""
+    connection = mock.Mock(name="redis_client")
+    pipeline = connection.pipeline.return_value
+    pipeline.execute = mock.Mock(return_value=['a', 'b'])
+
+    assert cluster.execute(connection, 'hgetall', ["a", "b"]) == ['a', 'b']
+    assert pipeline.mock_calls[:2] == [mock.call.hgetall("a"),
+                                       mock.call.hgetall("b")]
+    assert cluster.execute(connection, 'hgetall', []) == [], \
+        "No keys shouldn't create a pipeline"
+
+@mock.patch('redboy.cluster.is_cluster', mock.Mock(return_value=True))
+def test_execute_cluster():
+    """Test a cluster gets a single pipeline to split by node."""
+    connection = mock.Mock(name="redis_cluster")
+    connection.pipeline.return_value.execute = mock.Mock(
+        return_value=['a', 'b', 'c'])
+
+    assert cluster.execute(connection, 'hgetall', ["{a}1", "{b}1", "{a}2"]) \
+        == ['a', 'b', 'c'], "Replies should be in the order of the keys"
+    connection.pipeline.assert_called_once_with(transaction=False)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+# © 2012 Scott Reynolds
+# Author: Scott Reynolds <scott@scottreynolds.us>
+#
+"""Tests for the concurrency helpers"""
+import threading
+import time
+import mock
+import nose
+import redboy.concurrency as concurrency
+from redboy.concurrency import SingleFlight, parallel
+
+class _CountingCall(concurrency._Call):
+    """A call counting the threads waiting on it."""
+    waiting = []
+
+    def __init__(self):
+        super(_CountingCall, self).__init__()
+        wait = self.done.wait
+        def counting_wait():
+            self.waiting.append(1)
+            wait()
+        self.done.wait = counting_wait
+
+@mock.patch('redboy.concurrency._Call', _CountingCall)
+def test_single_flight_shares_call():
+    """Test concurrent calls for the same key share one call."""
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+    del _CountingCall.waiting[:]
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "record"
+
+    def worker():
+        results.append(flights.do("key", fetch))
+
+    leader = threading.Thread(target=worker)
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=worker) for _ in xrange(4)]
+    for thread in followers:
+        thread.start()
+    # Release the leader once every follower waits on its call.
+    while len(_CountingCall.waiting) < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert len(calls) == 1, "Only one fetch should be made: %d" % len(calls)
+    assert results == ["record"] * 5, "Every caller should get the result"
+    assert not flights._calls, "Finished calls should be forgotten"
+
+@nose.tools.raises(KeyError)
+def test_single_flight_raises():
+    """Test errors are raised to the caller."""
+    def fetch():
+        raise KeyError("missing")
+    SingleFlight().do("key", fetch)
+
+def test_parallel_order():
+    """Test results are returned in the order of groups."""
+    assert parallel(len, [[1], [1, 2], [1, 2, 3]]) == [1, 2, 3]
+    assert parallel(len, [[1]]) == [1]
+
+def test_parallel_nested():
+    """Test parallel() inside the pool runs in place and reuses the pool."""
+    def outer(group):
+        return parallel(len, [group, group])
+
+    assert parallel(outer, [[1], [1, 2]]) == [[1, 1], [2, 2]]
+    pool = concurrency._pool()
+    parallel(len, [[1], [2]])
+    assert concurrency._pool() is pool, "The thread pool should be shared"
@@ -20,3 +20,17 @@ def test_key_string():
     key = "prefix_key"
     assert str(Key(pool_name="test", prefix=prefix, key=key)) == prefix + key, \
         "Casting Key to string doesn't match its prefix + key"
+
+def test_hash_tag_string():
+    """Test that the hash tag is placed between the prefix and key"""
+    key = Key(pool_name="test", prefix="user:", key="scott", hash_tag="users")
+    assert str(key) == "user:{users}scott", \
+        "Hash tag should follow the prefix: %s" % (str(key),)
+    assert key.tagged_prefix() == "user:{users}", \
+        "Tagged prefix should include the hash tag"
+
+def test_own_hash_tag_string():
+    """Test that a hash tag of True tags the key with itself"""
+    key = Key(pool_name="test", prefix="user:", key="scott", hash_tag=True)
+    assert str(key) == "user:{scott}", \
+        "Key should be its own hash tag: %s" % (str(key),)
@@ -8,6 +8,7 @@ import mock
 import nose
 import redboy
 import redboy.record as record
+import redboy.view
 
 def setup_function():
     """Mock the redis database access"""
@@ -201,3 +202,426 @@ def test_removal():
         "Mirror should get its mirror key from record %s" % get_mirrors.mock_calls
     assert mock_mirror.mock_calls[1][0] == 'remove', \
         "Mock mirror should call delete on itself"
+
+class EmailReference(record.ReferenceMirror):
+    _parent_class = record.Record
+
+    def mirror_key(self, parent_record):
+        if 'email' in parent_record:
+            return self.make_key(parent_record['email'])
+
+    def make_key(self, key=None):
+        return record.Key("test_pool", "email:", key)
+
+@nose.with_setup(setup_function)
+def test_reference_mirrors():
+    new_record = record.Record(email="scott")
+    new_record.get_mirrors = mock.Mock(name="get_mirrors",
+                                       return_value=[EmailReference()])
+    new_record.save()
+
+    pipeline = record.get_pool("test_pool").pipeline.return_value
+    assert mock.call.set("email:scott", str(new_record.key)) in \
+        pipeline.mock_calls, \
+        "Reference mirror should only store the parent key"
+    assert not [call for call in pipeline.mock_calls
+                if call[0] == 'hset' and call[1][0] == "email:scott"], \
+        "Reference mirror shouldn't store a copy of the fields"
+
+    client = record.get_pool("test_pool")
+    script = mock.Mock(name="script",
+                       return_value=["record:scott", ["name", "scott"]])
+    client.register_script = mock.Mock(return_value=script)
+    loaded = EmailReference().load("scott")
+
+    script.assert_called_once_with(keys=["email:scott"], args=[])
+    assert loaded['name'] == "scott", \
+        "Reference mirror should load the parent's fields"
+    assert not loaded._modified, \
+        "Loaded reference mirror shouldn't have any modifications"
+    assert str(loaded.key) == "email:scott", \
+        "Reference mirror should keep its own key"
+    assert loaded.parent_key == "record:scott", \
+        "Reference mirror should expose the parent key"
+    assert isinstance(loaded.parent, record.Record) and \
+        loaded.parent.key.key == "scott" and \
+        loaded.parent['name'] == "scott", \
+        "Reference mirror should resolve the parent record"
+
+@nose.with_setup(setup_function)
+def test_reference_mirror_moves():
+    saved = record.Record().load("scott")
+    saved.get_mirrors = mock.Mock(name="get_mirrors",
+                                  return_value=[EmailReference()])
+    pipeline = record.get_pool("test_pool").pipeline.return_value
+
+    saved['name'] = "scotty"
+    saved.save()
+    assert 'set' not in [call[0] for call in pipeline.mock_calls], \
+        "Unchanged references shouldn't be written again"
+
+    saved['email'] = "scotty@scottreynolds.us"
+    saved.save()
+    assert mock.call.delete("email:scott@scottreynolds.us") in \
+        pipeline.mock_calls, \
+        "The reference under the old mirror key should be deleted"
+    assert mock.call.set("email:scotty@scottreynolds.us", "record:scott") in \
+        pipeline.mock_calls, \
+        "The reference should be saved under the new mirror key"
+
+    pipeline.reset_mock()
+    saved.set_fields({'email': "scott@scottreynolds.us"})
+    assert mock.call.delete("email:scotty@scottreynolds.us") in \
+        pipeline.mock_calls, \
+        "set_fields should move the reference too"
+
+@nose.with_setup(setup_function)
+def test_load_by_index():
+    client = record.get_pool("test_pool")
+    script = mock.Mock(name="script",
+                       return_value=["scott", ["name", "scott"]])
+    client.register_script = mock.Mock(return_value=script)
+
+    loaded_record = record.Record().load_by_index("email",
+                                                  "scott@scottreynolds.us")
+
+    script.assert_called_once_with(keys=["record:byfield:email"],
+                                   args=["scott@scottreynolds.us", "record:",
+                                         ""])
+    assert loaded_record.key.key == "scott", \
+        "Record key should be loaded from the index"
+    assert loaded_record['name'] == "scott", \
+        "Record should be loaded in the same script call"
+    assert 'hget' not in [call[0] for call in client.mock_calls], \
+        "load_by_index shouldn't read the index on its own"
+
+    script.return_value = []
+    missing = record.Record().load_by_index("email", "missing")
+    assert not missing.key and not missing, \
+        "Missing index values should leave an empty record"
+
+@nose.with_setup(setup_function)
+def test_load_many_by_index():
+    client = record.get_pool("test_pool")
+    client.hmget = mock.Mock(return_value=["scott", None, "dangling"])
+    pipeline = client.pipeline.return_value
+    pipeline.execute = mock.Mock(return_value=[{'name': 'scott'}, {}])
+
+    records = record.Record().load_many_by_index(
+        "email", ["scott@scottreynolds.us", "missing", "dangling"])
+
+    client.hmget.assert_called_once_with(
+        "record:byfield:email",
+        ["scott@scottreynolds.us", "missing", "dangling"])
+    assert pipeline.mock_calls[:2] == [mock.call.hgetall("record:scott"),
+                                       mock.call.hgetall("record:dangling")], \
+        "Records should be fetched in one pipeline: %s" % pipeline.mock_calls
+    assert len(records) == 3, "A result for each value is expected"
+    assert records[0]['name'] == "scott" and records[0].key.key == "scott", \
+        "First value should load the record"
+    assert records[1] is None and records[2] is None, \
+        "Missing and dangling values should be marked with None"
+
+    assert record.Record().load_many_by_index("email", []) == [], \
+        "No values should not touch Redis"
+
+@nose.with_setup(setup_function)
+@mock.patch('redboy.cluster.is_cluster', mock.Mock(return_value=True))
+def test_load_by_index_cluster():
+    class Spread(record.Record):
+        _hash_tag = True
+
+    client = record.get_pool("test_pool")
+    client.hget = mock.Mock(return_value="scott")
+    loaded_record = Spread().load_by_index("email", "scott@scottreynolds.us")
+
+    assert not client.register_script.called, \
+        "Scripts can't read keys of other slots"
+    client.hget.assert_called_once_with("spread:byfield:{email}",
+                                        "scott@scottreynolds.us")
+    client.hgetall.assert_called_once_with("spread:{scott}")
+    assert loaded_record.key.key == "scott" and loaded_record['name'], \
+        "Record should be loaded from the index"
+
+@nose.with_setup(setup_function)
+def test_hash_tag():
+    class Tagged(record.Record):
+        _hash_tag = "tagged"
+
+    tagged = Tagged()
+    assert str(tagged.make_key("scott")) == "tagged:{tagged}scott", \
+        "Record keys should carry the hash tag"
+    assert str(tagged.make_index_key("email")) == \
+        "tagged:byfield:{tagged}email", \
+        "Index keys should carry the hash tag"
+
+@nose.with_setup(setup_function)
+def test_load_many():
+    client = record.get_pool("test_pool")
+    pipeline = client.pipeline.return_value
+    pipeline.execute = mock.Mock(return_value=[{'name': 'scott'}, {}])
+
+    records = record.Record().load_many(
+        ["scott", record.Key(pool_name="record", prefix="record:",
+                             key="missing")])
+
+    assert pipeline.mock_calls[:2] == [mock.call.hgetall("record:scott"),
+                                       mock.call.hgetall("record:missing")], \
+        "Keys in the same pool should share a pipeline: %s" % \
+        pipeline.mock_calls
+    assert records[0]['name'] == "scott" and records[0].key.key == "scott", \
+        "First key should load the record"
+    assert records[1] is None, "Missing records should be marked with None"
+
+@nose.with_setup(setup_function)
+def test_single_flight_load():
+    class Shared(record.Record):
+        _single_flight = True
+
+    with mock.patch.object(record.FLIGHTS, 'do',
+                           mock.Mock(return_value={'name': 'scott'})) as do:
+        loaded = Shared().load("scott")
+
+    assert do.call_args[0][0] == ('hgetall', 'shared', 'shared:scott'), \
+        "Load should go through the single flight group: %s" % do.call_args
+    assert loaded['name'] == "scott", "Shared result should be loaded"
+
+@nose.with_setup(setup_function)
+def test_change_stream():
+    class Streamed(record.Record):
+        _pool_name = "test_pool"
+        _stream = record.Key(pool_name="test_pool", prefix="changes:",
+                             key="streamed")
+
+    loaded_record = Streamed().load("scott")
+    loaded_record['name'] = "scotty"
+    del loaded_record['email']
+    loaded_record.save()
+
+    pipeline = record.get_pool("test_pool").pipeline.return_value
+    xadds = [call for call in pipeline.mock_calls if call[0] == 'xadd']
+    assert len(xadds) == 1, "Save should add a single change event"
+    assert xadds[0][1][0] == "changes:streamed", \
+        "Event should be added to the record's stream"
+    event = xadds[0][1][1]
+    assert event['operation'] == 'save' and event['key'] == "scott", \
+        "Event should describe the save: %s" % (event,)
+    assert event['changed'] == '["name"]' and event['deleted'] == '["email"]', \
+        "Event should hold the changed and deleted fields: %s" % (event,)
+    assert pipeline.mock_calls.index(xadds[0]) < \
+        pipeline.mock_calls.index(mock.call.execute()), \
+        "Event should be sent in the same pipeline as the write"
+
+    pipeline.reset_mock()
+    loaded_record.save()
+    assert 'xadd' not in [call[0] for call in pipeline.mock_calls], \
+        "Saving without changes shouldn't add an event"
+
+    loaded_record.remove()
+    xadds = [call for call in pipeline.mock_calls if call[0] == 'xadd']
+    assert xadds[0][1][1]['operation'] == 'remove', \
+        "Remove should add a change event"
+
+    pipeline.reset_mock()
+    unloaded = Streamed()
+    unloaded.key = unloaded.make_key("thomas")
+    unloaded.remove()
+    xadds = [call for call in pipeline.mock_calls if call[0] == 'xadd']
+    assert len(xadds) == 1 and xadds[0][1][1]['key'] == "thomas", \
+        "Removing a record without loaded fields should add an event"
+
+@nose.with_setup(setup_function)
+def test_change_stream_pool():
+    class Elsewhere(record.Record):
+        _stream = record.Key(pool_name="events", prefix="changes:",
+                             key="elsewhere")
+
+    saved = Elsewhere(name="scott")
+    nose.tools.assert_raises(AssertionError, saved.save)
+
+@nose.with_setup(setup_function)
+def test_incr():
+    loaded_record = record.Record().load(
+        record.Key(pool_name="test_pool", prefix="test", key="scott"))
+    loaded_record['name'] = "scotty"
+
+    mirror = mock.Mock(name="mirror", spec=record.MirroredRecord)
+    mirror._pool_name = "test_pool"
+    mirror.mirror_key = mock.Mock(name="mirror_key",
+                                  return_value=record.Key(pool_name="test_pool",
+                                                          key="mirror"))
+    view = mock.Mock(name="view")
+    view.update = mock.Mock(return_value=False)
+    loaded_record.get_mirrors = mock.Mock(return_value=[mirror])
+    loaded_record.get_views = mock.Mock(return_value=[view])
+
+    pipeline = record.get_pool("test_pool").pipeline.return_value
+    pipeline.execute = mock.Mock(return_value=[5, "5", 5])
+    assert loaded_record.incr("visits", 2) == 5, "New value is returned"
+
+    assert pipeline.mock_calls[:4] == [mock.call.hincrby("testscott",
+                                                         "visits", 2),
+                                       mock.call.hget("testscott", "visits"),
+                                       mock.call.hincrby("mirror", "visits", 2),
+                                       mock.call.execute()], \
+        "Record and mirror should be incremented in one pipeline: %s" % \
+        pipeline.mock_calls
+    assert loaded_record['visits'] == "5" and \
+        'visits' not in loaded_record._modified, \
+        "Local record should hold the saved value as loaded from Redis"
+    assert 'name' in loaded_record._modified, \
+        "Pending changes should be left alone"
+    view.update.assert_called_once_with(loaded_record, {'visits': 2},
+                                        pipeline)
+    assert not view.rescore.called, "Only views asking for it are rescored"
+
+    nose.tools.assert_raises(record.exc.ErrorMissingKey,
+                             record.Record().incr, "visits")
+
+@nose.with_setup(setup_function)
+def test_incr_unloaded():
+    unloaded = record.Record()
+    unloaded.key = record.Key(pool_name="test_pool", prefix="test",
+                              key="scott")
+    visits = redboy.view.Score(
+        record.Key("test_pool", "visits:", "records"),
+        lambda record: record['visits'], field="visits")
+    recent = redboy.view.Score(
+        record.Key("test_pool", "recent:", "records"),
+        lambda record: record['created'])
+    unloaded.get_views = mock.Mock(return_value=[visits, recent])
+
+    pipeline = record.get_pool("test_pool").pipeline.return_value
+    pipeline.execute = mock.Mock(return_value=[5, "5"])
+    with mock.patch("redboy.view.get_pool", record.get_pool):
+        assert unloaded.incr("visits", 2) == 5, "New value is returned"
+
+    assert mock.call.zincrby("visits:records", 2, "scott") in \
+        pipeline.mock_calls, \
+        "A score of the field should be incremented with the record: %s" % \
+        pipeline.mock_calls
+    assert not record.get_pool("test_pool").zadd.called, \
+        "Scores that can't be computed from an unloaded record are skipped"
+
+@nose.with_setup(setup_function)
+def test_incr_other_pool():
+    clients = {}
+    def get_pool(pool_name):
+        if pool_name not in clients:
+            clients[pool_name] = mock.Mock(name=pool_name)
+        return clients[pool_name]
+    record.get_pool = get_pool
+
+    unloaded = record.Record()
+    unloaded.key = record.Key(pool_name="test_pool", prefix="test",
+                              key="scott")
+    mirror = mock.Mock(name="mirror", spec=record.MirroredRecord)
+    mirror._pool_name = "other_pool"
+    mirror.mirror_key = mock.Mock(return_value=record.Key(None, key="mirror"))
+    unloaded.get_mirrors = mock.Mock(return_value=[mirror])
+
+    calls = mock.Mock()
+    calls.attach_mock(get_pool("test_pool").pipeline.return_value, "record")
+    calls.attach_mock(get_pool("other_pool").pipeline.return_value, "other")
+    calls.record.execute = mock.Mock(side_effect=ValueError)
+    nose.tools.assert_raises(ValueError, unloaded.incr, "visits")
+    assert calls.mock_calls[-1] == mock.call.record.execute(), \
+        "Other pools shouldn't be written when the record fails: %s" % \
+        calls.mock_calls
+
+    calls.record.execute = mock.Mock(return_value=[5, "5"])
+    calls.reset_mock()
+    unloaded.incr("visits")
+    assert calls.mock_calls[-2:] == [mock.call.record.execute(),
+                                     mock.call.other.execute()], \
+        "Other pools should be written after the record: %s" % \
+        calls.mock_calls
+    assert mock.call.other.hincrby("mirror", "visits", 1) in \
+        calls.mock_calls and not get_pool("other_pool").hincrby.called, \
+        "Other pools should only be written through their pipeline"
+
+@nose.with_setup(setup_function)
+def test_set_fields():
+    loaded_record = record.Record().load(
+        record.Key(pool_name="test_pool", prefix="test", key="scott"))
+    view = mock.Mock(name="view")
+    loaded_record.get_views = mock.Mock(return_value=[view])
+
+    pipeline = record.get_pool("test_pool").pipeline.return_value
+    loaded_record.set_fields({'name': "scotty"})
+
+    assert pipeline.mock_calls[:2] == [mock.call.hset("testscott", "name",
+                                                      "scotty"),
+                                       mock.call.execute()], \
+        "Fields should be set in one pipeline: %s" % pipeline.mock_calls
+    assert loaded_record['name'] == "scotty" and not loaded_record._modified, \
+        "Local record should hold the saved value"
+    view.append.assert_called_once_with(loaded_record, False)
+
+    nose.tools.assert_raises(record.exc.ErrorInvalidValue,
+                             loaded_record.set_fields, {'name': None})
+
+class EmailCopy(record.MirroredRecord):
+    def mirror_key(self, parent_record):
+        if 'email' in parent_record:
+            return self.make_key(parent_record['email'])
+
+    def make_key(self, key=None):
+        return record.Key("test_pool", "copy:", key)
+
+@nose.with_setup(setup_function)
+def test_set_fields_moves_mirror():
+    loaded_record = record.Record().load(
+        record.Key(pool_name="test_pool", prefix="test", key="scott"))
+    loaded_record.get_mirrors = mock.Mock(return_value=[EmailCopy()])
+
+    pipeline = record.get_pool("test_pool").pipeline.return_value
+    loaded_record.set_fields({'email': "scotty@scottreynolds.us"})
+
+    assert mock.call.delete("copy:scott@scottreynolds.us") in \
+        pipeline.mock_calls, \
+        "The stale copy should be removed: %s" % pipeline.mock_calls
+    copied = [call[1][1:] for call in pipeline.mock_calls
+              if call[0] == "hset" and call[1][0] ==
+              "copy:scotty@scottreynolds.us"]
+    assert sorted(copied) == [('awesome', True),
+                              ('email', "scotty@scottreynolds.us"),
+                              ('name', "scott")], \
+        "The copy should be rebuilt at the new key: %s" % pipeline.mock_calls
+
+@nose.with_setup(setup_function)
+def test_set_fields_keeps_pending_changes():
+    loaded_record = record.Record().load(
+        record.Key(pool_name="test_pool", prefix="test", key="scott"))
+    del loaded_record['awesome']
+    loaded_record.set_fields({'name': "scotty"})
+    assert 'awesome' in loaded_record._deleted, \
+        "Pending deletions should survive set_fields"
+
+    pipeline = record.get_pool("test_pool").pipeline.return_value
+    pipeline.reset_mock()
+    loaded_record.save()
+    assert mock.call.hdel("testscott", "awesome") in pipeline.mock_calls, \
+        "The pending deletion should be saved: %s" % pipeline.mock_calls
+
+@nose.with_setup(setup_function)
+def test_removal_leaves_shared_instances():
+    mirror = EmailReference()
+    view = mock.Mock(name="view", record_class=record.Record)
+    bound = mock.Mock(name="bound_view", record_class=EmailReference)
+
+    class Removed(record.Record):
+        pass
+
+    loaded_record = Removed().load("scott")
+    loaded_record.get_mirrors = mock.Mock(return_value=[mirror])
+    loaded_record.get_views = mock.Mock(return_value=[view, bound])
+    loaded_record.remove()
+
+    client = record.get_pool("test_pool")
+    client.delete.assert_called_once_with("email:scott@scottreynolds.us")
+    assert mirror.key is None, "The shared mirror shouldn't be changed"
+    assert view.record_class is Removed, \
+        "Unbound views should read the record's class"
+    assert bound.record_class is EmailReference, \
+        "Bound views shouldn't be changed: %s" % bound.record_class
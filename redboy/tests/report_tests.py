@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# © 2012 Scott Reynolds
+# Author: Scott Reynolds <scott@scottreynolds.us>
+#
+"""Tests for the footprint report"""
+import mock
+import nose
+import redboy.report as report
+from redboy.key import Key
+from redboy.record import Record, ReferenceMirror
+from redboy.view import Queue
+
+class UserEmail(ReferenceMirror):
+    def make_key(self, key=None):
+        return Key("test_pool", "user:email:", key)
+
+class User(Record):
+    _prefix = "user:"
+    _pool_name = "test_pool"
+    _indices = ('email',)
+    _views = (Queue(Key("test_pool", "created:", "users")),)
+    _mirrors = (UserEmail(),)
+
+def setup_function():
+    """Mock the redis database access"""
+    client = mock.Mock(name="redis_client")
+    client.scan_iter = lambda match, count: [
+        key for key in ["user:1", "user:2", "user:3", "user:email:a",
+                        "user:byfield:email"]
+        if key.startswith(match.rstrip("*"))]
+
+    def make_pipeline(transaction):
+        pipeline = mock.Mock(name="pipeline")
+        def execute():
+            replies = []
+            for name, args, _ in pipeline.mock_calls:
+                if name == 'execute_command':
+                    replies.append(len(args[1]) * 10)
+                elif name == 'object':
+                    replies.append("ziplist")
+                else:
+                    replies.append(2)
+            return replies
+        pipeline.execute = execute
+        return pipeline
+    client.pipeline = make_pipeline
+    report.get_pool = mock.Mock(name="redis", return_value=client)
+
+@nose.with_setup(setup_function)
+def test_footprint():
+    rows = dict(((row['structure'], row) for row in
+                 report.footprint([User], sample=2, batch=1)))
+
+    assert sorted(rows) == ['index', 'mirror', 'record', 'view'], \
+        "Every structure should be reported: %s" % rows.keys()
+    user = rows['record']
+    assert user['keys'] == 3, \
+        "Mirror and index keys shouldn't be counted as records: %d" % \
+        user['keys']
+    assert user['sampled'] == 2, "Only sample keys should be measured"
+    assert user['bytes'] == 180 and user['average_bytes'] == 60, \
+        "Totals should be estimated from the sample: %s" % user
+    assert user['average_width'] == 2 and user['encodings'] == {'ziplist': 2}
+    assert user['largest'] == [("user:1", 60), ("user:2", 60)]
+
+    assert rows['mirror']['keys'] == 1 and \
+        rows['mirror']['average_width'] == 0, \
+        "Reference mirrors have no fields: %s" % rows['mirror']
+    assert rows['index']['name'] == "user:byfield:email"
+    assert rows['view']['name'] == "created:users"
+
+    assert "user:byfield:email" in report.format_report(rows.values())
+
+@nose.with_setup(setup_function)
+def test_totals():
+    rows = report.footprint([User], sample=2, batch=1)
+    user = report.totals(rows)
+    assert len(user) == 1 and user[0]['class'] == "User", \
+        "Rows should be rolled up by class"
+    assert user[0]['bytes'] == sum(row['bytes'] for row in rows)
+    assert user[0]['keys'] == sum(row['keys'] for row in rows)
+    assert user[0]['structures']['record'] == 180, \
+        "Bytes should be totaled by structure type: %s" % user[0]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+#
+# © 2012 Scott Reynolds
+# Author: Scott Reynolds <scott@scottreynolds.us>
+#
+"""Tests for the change stream consumer"""
+import mock
+import nose
+import redis
+import redboy.stream as stream
+from redboy.key import Key
+from redboy.record import Record
+
+class Streamed(Record):
+    _pool_name = "test_pool"
+    _stream = Key(pool_name="test_pool", prefix="changes:", key="streamed")
+
+def setup_function():
+    """Mock the redis database access"""
+    stream.get_pool = mock.Mock(name="redis",
+                                return_value=mock.Mock(name="redis_client"))
+
+@nose.with_setup(setup_function)
+def test_read():
+    client = stream.get_pool("test_pool")
+    client.xreadgroup = mock.Mock(return_value=[
+        ["changes:streamed", [
+            ("1-0", {'operation': 'save', 'key': 'scott',
+                     'changed': '["name"]', 'deleted': '[]'}),
+            ("2-0", {'operation': 'remove', 'key': 'gone',
+                     'changed': '[]', 'deleted': '["name"]'})]]])
+    scott = Streamed(name="scott")
+    with mock.patch.object(Streamed, 'load_many',
+                           mock.Mock(return_value=[scott])) as load_many:
+        batch = stream.ChangeStream(Streamed, "indexer", "worker-1").read(10)
+
+    client.xreadgroup.assert_called_once_with(
+        "indexer", "worker-1", {"changes:streamed": ">"}, count=10,
+        block=None)
+    load_many.assert_called_once_with(["scott"])
+    assert batch[0] == ("1-0", {'operation': 'save', 'key': 'scott',
+                                'changed': ["name"], 'deleted': []}, scott), \
+        "Saved events should come with their record: %s" % (batch[0],)
+    assert batch[1][0] == "2-0" and batch[1][2] is None, \
+        "Removed events shouldn't load a record"
+
+@nose.with_setup(setup_function)
+def test_ack():
+    client = stream.get_pool("test_pool")
+    stream.ChangeStream(Streamed, "indexer", "worker-1").ack(
+        [("1-0", {}, None), ("2-0", {}, None)])
+    client.xack.assert_called_once_with("changes:streamed", "indexer",
+                                        "1-0", "2-0")
+
+@nose.with_setup(setup_function)
+def test_create_group_exists():
+    client = stream.get_pool("test_pool")
+    client.xgroup_create = mock.Mock(side_effect=redis.ResponseError(
+        "BUSYGROUP Consumer Group name already exists"))
+    stream.ChangeStream(Streamed, "indexer", "worker-1").create_group()
+    client.xgroup_create.assert_called_once_with(
+        "changes:streamed", "indexer", id="0", mkstream=True)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# © 2012 Scott Reynolds
+# Author: Scott Reynolds <scott@scottreynolds.us>
+#
+"""Tests for the View classes"""
+import mock
+import nose
+import redboy.view as view
+from redboy.key import Key
+from redboy.record import Record
+
+def setup_function():
+    """Mock the redis database access"""
+    view.get_pool = mock.Mock(name="redis",
+                              return_value=mock.Mock(name="redis_client"))
+
+def saved_record():
+    """Return a record with a key and a visits field."""
+    record = Record(visits=5)
+    record.key = Key(pool_name="test_pool", prefix="record:", key="scott")
+    return record
+
+@nose.with_setup(setup_function)
+def test_score_update_incr():
+    score = view.Score(Key("test_pool", "visits:", "records"),
+                       lambda record: record['visits'], field="visits")
+    score.update(saved_record(), {'visits': 2})
+    view.get_pool("test_pool").zincrby.assert_called_once_with(
+        "visits:records", 2, "scott")
+
+@nose.with_setup(setup_function)
+def test_score_update_recompute():
+    score = view.Score(Key("test_pool", "visits:", "records"),
+                       lambda record: record['visits'] * 2)
+    assert score.update(saved_record(), {'visits': 2}), \
+        "Scores without a field should ask to be recomputed"
+    assert not view.get_pool("test_pool").mock_calls
+    score.rescore(saved_record())
+    view.get_pool("test_pool").zadd.assert_called_once_with(
+        "visits:records", {"scott": 10})
+
+@nose.with_setup(setup_function)
+def test_score_rescore_unloaded():
+    score = view.Score(Key("test_pool", "visits:", "records"),
+                       lambda record: record['visits'] * 2)
+    unloaded = Record()
+    unloaded.key = Key(pool_name="test_pool", prefix="record:", key="scott")
+    score.rescore(unloaded)
+    assert not view.get_pool("test_pool").mock_calls, \
+        "Records missing score fields should be skipped"
+
+@nose.with_setup(setup_function)
+def test_list_update():
+    queue = view.Queue(Key("test_pool", "created:", "records"))
+    assert not queue.update(saved_record(), {'visits': 2})
+    assert not view.get_pool("test_pool").mock_calls, \
+        "Updating a record shouldn't change a list view"
+
+@nose.with_setup(setup_function)
+def test_slice_is_lazy():
+    client = view.get_pool("test_pool")
+    client.lrange = mock.Mock(return_value=["scott", "thomas", "gone"])
+    queue = view.Queue(Key("test_pool", "created:", "records"))
+
+    with mock.patch.object(Record, 'load_many',
+                           mock.Mock(return_value=[Record(name="scott"),
+                                                   Record(name="thomas"),
+                                                   None])) as load_many:
+        page = queue[0:2]
+        assert len(page) == 3 and page.keys() == ["scott", "thomas", "gone"], \
+            "Page keys should be read from the view"
+        assert [proxy.key.key for proxy in page] == page.keys()
+
+        saved = Record()
+        saved.key = Record().make_key("thomas")
+        assert "scott" in page and saved.key in page and saved in page and \
+            page[0] in page and page[0] in set(page), \
+            "Membership should compare keys"
+        assert "nobody" not in page and Record() not in page and \
+            Key("test_pool", "other:", "scott") not in page
+        assert not load_many.called, \
+            "Records shouldn't be loaded until a field is used"
+
+        assert page[1]['name'] == "thomas", "Proxy should load its record"
+        assert page[0]['name'] == "scott", "Page should be loaded together"
+        assert not page[2] and page[2].key.key == "gone", \
+            "Missing records should load empty"
+        assert load_many.call_count == 1, \
+            "Every record of the page should be loaded in one call"
+        assert [key.key for key in load_many.call_args[0][0]] == \
+            ["scott", "thomas", "gone"]
+
+    client.lrange.assert_called_once_with("created:records", 0, 2)
+
+@nose.with_setup(setup_function)
+def test_keys():
+    client = view.get_pool("test_pool")
+    client.zrange = mock.Mock(return_value=["scott"])
+    score = view.Score(Key("test_pool", "visits:", "records"),
+                       lambda record: record['visits'], True)
+
+    assert score.keys(0, 9) == ["scott"]
+    client.zrange.assert_called_once_with("visits:records", 0, 9, True)
+    assert not client.pipeline.called, "Records shouldn't be loaded"
+
+@nose.with_setup(setup_function)
+def test_iterate_pages():
+    client = view.get_pool("test_pool")
+    client.llen = mock.Mock(return_value=3)
+    client.lrange = mock.Mock(side_effect=[["a", "b"], ["c"]])
+    stack = view.Stack(Key("test_pool", "created:", "records"))
+    stack.page_size = 2
+
+    assert [proxy.key.key for proxy in stack] == ["a", "b", "c"]
+    assert client.lrange.call_args_list == [
+        mock.call("created:records", 0, 1),
+        mock.call("created:records", 2, 3)], \
+        "Iteration should read a page at a time"
@@ -6,10 +6,97 @@
 """Redboy: View implementation"""
 
 from redboy import get_pool
+from redboy.key import Key
 from redboy.record import Record
 
+class RecordProxy(object):
+    """Stands in for a Record of a Page, holding only its key until a field of
+    any Record of the Page is used. Proxies compare by identity, use record()
+    to compare the Records"""
+    def __init__(self, page, key):
+        """page is the Page the proxy belongs to and key the Record's Key."""
+        self.page, self.key, self._record = page, key, None
+
+    def record(self):
+        """Return the Record, loading the Page if it isn't loaded yet."""
+        if self._record is None:
+            self.page.load()
+        return self._record
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.record(), name)
+
+    def __getitem__(self, field):
+        return self.record()[field]
+
+    def __setitem__(self, field, value):
+        self.record()[field] = value
+
+    def __delitem__(self, field):
+        del self.record()[field]
+
+    def __contains__(self, field):
+        return field in self.record()
+
+    def __iter__(self):
+        return iter(self.record())
+
+    def __len__(self):
+        return len(self.record())
+
+    def __repr__(self):
+        return repr(self.record())
+
+class Page(list):
+    """A list of RecordProxy objects whose Records are loaded together in one
+    pipeline the first time any of them is used"""
+    def __init__(self, record_class, keys):
+        """record_class is the Record implementation and keys the string keys
+        of the Records."""
+        self.record_class = record_class
+        list.__init__(self, [RecordProxy(self, record_class().make_key(key))
+                             for key in keys])
+
+    def keys(self):
+        """Return the string keys of the Records without loading them."""
+        return [proxy.key.key for proxy in self]
+
+    def __contains__(self, item):
+        """Return whether item, a Key, a string key or a Record, is in the Page
+        without loading it."""
+        if isinstance(item, basestring):
+            return item in self.keys()
+        key = item if isinstance(item, Key) else getattr(item, 'key', None)
+        if not key:
+            return False
+        return str(key) in [str(proxy.key) for proxy in self]
+
+    def load(self):
+        """Load every Record of the Page that isn't loaded yet."""
+        proxies = [proxy for proxy in self if proxy._record is None]
+        records = self.record_class().load_many(
+            [proxy.key for proxy in proxies])
+        for proxy, record in zip(proxies, records):
+            if record is None:
+                # Like Record.load(), a missing record is empty.
+                record = self.record_class()
+                record.key = proxy.key
+            proxy._record = record
+        return self
+
+def _iterate(view):
+    """Yield the RecordProxy objects of view a Page at a time."""
+    for start in xrange(0, len(view), view.page_size):
+        for proxy in view[start:start + view.page_size - 1]:
+            yield proxy
+
 class View(object):
     """A View is a set of Records. The how of the ordering is determined by Subclasses"""
+    # Number of Records loaded together while iterating over the View
+    page_size = 100
+
     def __init__(self, view_key, record_class=None):
         """view_key is the redboy.key.Key for the set of records and
         record_class is the Record implementation."""
@@ -20,23 +107,30 @@ class View(object):
         """Add the Record to the View"""
         raise NotImplemented("Use a Subclass to append to the View")
 
+    def update(self, record, increments, pipeline=None):
+        """Queue the changes the increments, a dictionary of field to amount,
+        make to the View in pipeline. Returns whether the View has to rescore()
+        the Record once they are saved. The order of a list doesn't depend on
+        the fields of its Records"""
+        return False
+
     def remove(self, record):
         """Remove the Record from the View"""
         get_pool(self.key.pool_name).lrem(str(self.key), 0, record.key.key)
 
+    def keys(self, start=0, stop=-1):
+        """Return the string keys of the Records from start to stop, inclusive,
+        without loading the Records."""
+        return get_pool(self.key.pool_name).lrange(str(self.key), start, stop)
+
     def __iter__(self):
-        connection_pool = get_pool(self.key.pool_name)
-        for x in xrange(0, len(self)):
-            record_key = connection_pool.lindex(str(self.key), x)
-            yield self.record_class().load(record_key)
+        return _iterate(self)
 
     def __getitem__(self, key):
         if isinstance(key, slice):
-            connection = get_pool(self.key.pool_name)
             # @TODO: slice.step is completly ignored.
-            response = connection.lrange(str(self.key), key.start, key.stop)
-            return [self.record_class().load(record_key)
-                    for record_key in response]
+            return Page(self.record_class, self.keys(
+                key.start or 0, -1 if key.stop is None else key.stop))
 
         # Else return the one at the spot.
         record_key = get_pool(self.key.pool_name).lindex(str(self.key), key)
@@ -64,43 +158,69 @@ class Queue(View):
 
 class Score(object):
     """A Score view is a set of Records ordered by a score function"""
-    def __init__(self, view_key, score_function, reverse=False, record_class=None):
+    # Number of Records loaded together while iterating over the View
+    page_size = 100
+
+    def __init__(self, view_key, score_function, reverse=False, record_class=None,
+                 field=None):
         """view_key is the redboy.key.Key for the set of records and
-        record_class is the Record implementation."""
+        record_class is the Record implementation. field names the Record field
+        the score function returns, if any, so increments of it can be applied
+        with ZINCRBY."""
         record_class = record_class or Record
         self.key, self.record_class = view_key, record_class
         self.score = score_function
         self.reverse = reverse
+        self.field = field
 
     def append(self, record, new_record):
         """Add the Record to the View"""
         score = self.score(record)
-        get_pool(self.key.pool_name).zadd(str(self.key), score, record.key.key)
+        get_pool(self.key.pool_name).zadd(str(self.key),
+                                          {record.key.key: score})
+
+    def update(self, record, increments, pipeline=None):
+        """Queue the changes the increments, a dictionary of field to amount,
+        make to the score of the Record in pipeline. Returns whether the score
+        has to be recomputed with rescore() once they are saved, which is only
+        the case without a score field."""
+        if not self.field:
+            return True
+        if self.field in increments:
+            (pipeline or get_pool(self.key.pool_name)).zincrby(
+                str(self.key), increments[self.field], record.key.key)
+        return False
+
+    def rescore(self, record):
+        """Recompute the score of the Record. Records missing a field the score
+        function reads, like ones that were never loaded, are skipped."""
+        try:
+            score = self.score(record)
+        except KeyError:
+            return
+        get_pool(self.key.pool_name).zadd(str(self.key),
+                                          {record.key.key: score})
 
     def remove(self, record):
         """Remove the record from the set"""
         get_pool(self.key.pool_name).zrem(str(self.key), record.key.key)
 
+    def keys(self, start=0, stop=-1):
+        """Return the string keys of the Records from start to stop, inclusive,
+        without loading the Records."""
+        return get_pool(self.key.pool_name).zrange(
+            str(self.key),
+            start,
+            stop,
+            self.reverse)
+
     def __iter__(self):
-        connection_pool = get_pool(self.key.pool_name)
-        for x in xrange(0, len(self)):
-            record_key = connection_pool.zrange(
-                str(self.key),
-                x,
-                x,
-                self.reverse)
-            yield self.record_class().load(record_key[0])
+        return _iterate(self)
 
     def __getitem__(self, key):
         if isinstance(key, slice):
-            connection = get_pool(self.key.pool_name)
-            response = connection.zrange(
-                str(self.key),
-                key.start,
-                key.stop,
-                self.reverse)
-            return [self.record_class().load(record_key)
-                    for record_key in response]
+            return Page(self.record_class, self.keys(
+                key.start or 0, -1 if key.stop is None else key.stop))
 
         record_key = get_pool(self.key.pool_name).zrange(
             str(self.key),
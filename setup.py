@@ -25,7 +25,7 @@ setup(name="Redboy",
       author_email="Scott@scottreynolds.us",
       license="Three-clause BSD",
       keywords="database cassandra",
-      install_requires=['redis'],
+      install_requires=['redis>=3.0'],
       zip_safe=False,
       tests_require=['nose', 'mock'],
       long_description=read('README'),